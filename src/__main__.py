@@ -3,17 +3,31 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import base64
-import gzip
+import functools
 import json
 import logging
 import os
+import re
 from dataclasses import dataclass
-from typing import Any, Callable, Collection, Iterable, TypeVar, cast
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Collection,
+    Iterable,
+    TypeVar,
+    cast,
+)
 
+import httpx
 import hvac  # type: ignore
+import hvac.adapters  # type: ignore
 import hvac.exceptions  # type: ignore
-import requests.exceptions  # type: ignore
+import orjson
+import pybase64
 import uvicorn
 from fastapi import (
     Depends,
@@ -23,8 +37,12 @@ from fastapi import (
     Response,
     status,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.datastructures import State
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from isal import igzip as gzip
+from isal import isal_zlib
 from typing_extensions import Annotated, Concatenate, ParamSpec
 
 LockData = Any
@@ -32,9 +50,47 @@ StateData = Any
 
 
 STATE_ENCODING = "utf-8"
-GZIP_COMPRESSLEVEL = 9
-FORMAT_VERSION = "v0"
-SERIALIZED_STATE_PIECES = 2  # number of distinct pieces to a serialized state: version + payload
+DEFLATE_COMPRESSLEVEL = 1  # ISA-L levels range 0-3, 1 compresses states as well as 3 does
+DEFLATE_WBITS = -15  # max window size, raw stream as gzip can't carry a preset dictionary
+FORMAT_VERSION = "v1"
+GZIP_FORMAT_VERSION = "v0"  # gzip without preset dictionary, still unpacked but no longer packed
+FORMAT_PREFIX = f"{FORMAT_VERSION}:".encode(STATE_ENCODING)
+GZIP_FORMAT_PREFIX = f"{GZIP_FORMAT_VERSION}:".encode(STATE_ENCODING)
+PYBASE64_MIN_SIZE = 64  # below this many bytes, stdlib base64 beats pybase64's call overhead
+PROBE_START_SIZE = 64 * 1024  # chunk size, in bytes, to start probing for the max chunk size at
+PROBE_PRECISION = 8  # stop probing once the max chunk size is known to within 1/8th of itself
+MAX_CONCURRENT_REQUESTS = 8  # max number of chunk requests in flight to Vault per state operation
+COERCION_CACHE_SIZE = 256  # max number of coerced Vault attrs to remember
+# orjson only handles 64-bit integers, which 19 digits may already overflow. Digit runs in strings
+# match too, which merely falls back to the slower but lossless stdlib json.
+LONG_INT_PATTERN = re.compile(rb"\d{19}")
+
+# Preset dictionary of JSON snippets common to Terraform states, as serialized by orjson. DEFLATE
+# favours matches at the end of the dictionary, so the most common snippets come last. This must
+# never change within a FORMAT_VERSION, or previously packed states can't be unpacked anymore.
+TERRAFORM_DICT = (
+    b'"sensitive":true,"value":"","type":"string"}},'
+    b'"registry.terraform.io/hashicorp/azurerm\\"]"'
+    b'"registry.terraform.io/hashicorp/google\\"]"'
+    b'"registry.terraform.io/hashicorp/kubernetes\\"]"'
+    b'"registry.terraform.io/hashicorp/helm\\"]"'
+    b'"registry.terraform.io/hashicorp/vault\\"]"'
+    b'"registry.terraform.io/hashicorp/random\\"]"'
+    b'"registry.terraform.io/hashicorp/null\\"]"'
+    b'"registry.terraform.io/hashicorp/tls\\"]"'
+    b'"each":"map","each":"list","index_key":"status":"tainted","deposed":"'
+    b'"description":"","created_at":"","region":"","arn":"arn:aws:iam::'
+    b'"attributes":{"id":"","name":"","tags":null,"tags_all":{},"timeouts":null},'
+    b'"sensitive_attributes":[],"private":"bnVsbA==",'
+    b'"private":"eyJzY2hlbWFfdmVyc2lvbiI6IjAifQ==",'
+    b'"dependencies":[],"create_before_destroy":true}]},'
+    b'{"version":4,"terraform_version":"1.","serial":1,"lineage":"","outputs":{},'
+    b'"resources":[],"check_results":null}'
+    b'{"mode":"data","type":"","name":"","provider":"module.'
+    b'{"mode":"managed","type":"","name":"",'
+    b'"provider":"provider[\\"registry.terraform.io/hashicorp/aws\\"]",'
+    b'"instances":[{"schema_version":0,"attributes":{"id":"'
+)
 
 
 class StateFormatError(ValueError):
@@ -57,6 +113,13 @@ class UnsupportedFormatVersionError(StateFormatError):
         super().__init__(msg, *args)
 
 
+class TruncatedStateError(StateFormatError):
+    """Error indicating that the given serialized state ends before its compressed data does."""
+
+    def __init__(self, *args: object) -> None:
+        super().__init__("compressed state is truncated", *args)
+
+
 def strtuple(xs: Iterable[Any]) -> str:
     """Make a tuple-looking string representation of an iterable.
 
@@ -68,8 +131,10 @@ def strtuple(xs: Iterable[Any]) -> str:
     return f"({', '.join(xs)})"
 
 
-def pack_state(o: Any) -> str:
-    """Turn an object into a compressed base64-string.
+def pack_state(o: Any) -> bytes:
+    """Turn an object into a compressed, version-prefixed base64 bytestring.
+
+    The result is pure ASCII, i.e. its length equals its size in bytes.
 
     This function is the inverse of unpack_state.
 
@@ -78,15 +143,22 @@ def pack_state(o: Any) -> str:
         o: the object to stringify.
 
     """
-    json_str = json.dumps(o)
-    json_bytes = json_str.encode(STATE_ENCODING)
-    gzip_bytes = gzip.compress(json_bytes, compresslevel=GZIP_COMPRESSLEVEL, mtime=0)
-    b64bytes = base64.b64encode(gzip_bytes)
-    b64 = b64bytes.decode(STATE_ENCODING)
-    return f"{FORMAT_VERSION}:{b64}"
-
-
-def unpack_state(state: str) -> Any:
+    compressor = isal_zlib.compressobj(
+        DEFLATE_COMPRESSLEVEL, isal_zlib.DEFLATED, DEFLATE_WBITS, zdict=TERRAFORM_DICT
+    )
+    try:
+        json_bytes = orjson.dumps(o)
+    except orjson.JSONEncodeError:  # integers beyond 64 bits, valid in Terraform states
+        json_bytes = json.dumps(o).encode(STATE_ENCODING)
+    deflate_bytes = compressor.compress(json_bytes) + compressor.flush()
+    if len(deflate_bytes) < PYBASE64_MIN_SIZE:
+        b64bytes = base64.b64encode(deflate_bytes)
+    else:
+        b64bytes = pybase64.b64encode(deflate_bytes)
+    return b"".join((FORMAT_PREFIX, b64bytes))
+
+
+def unpack_state(state: str | bytes) -> Any:
     """Turn a compressed, version-prefixed Terraform state into a Python object.
 
     This function is the inverse of pack_state.
@@ -96,18 +168,34 @@ def unpack_state(state: str) -> Any:
         state: The compressed and versioned state.
 
     """
-    version_and_payload = state.split(":", 1)
-    if len(version_and_payload) != SERIALIZED_STATE_PIECES:
-        raise MissingFormatVersionError
-    version, b64 = version_and_payload
-    if version != FORMAT_VERSION:
-        raise UnsupportedFormatVersionError(version)
-
-    b64bytes = b64.encode(STATE_ENCODING)
-    gzip_bytes = base64.b64decode(b64bytes)
-    json_bytes = gzip.decompress(gzip_bytes)
-    json_str = json_bytes.decode(STATE_ENCODING)
-    o = json.loads(json_str)
+    if isinstance(state, str):
+        state = state.encode(STATE_ENCODING)
+    if state.startswith(FORMAT_PREFIX):
+        is_gzip = False
+        b64bytes = memoryview(state)[len(FORMAT_PREFIX) :]
+    elif state.startswith(GZIP_FORMAT_PREFIX):
+        is_gzip = True
+        b64bytes = memoryview(state)[len(GZIP_FORMAT_PREFIX) :]
+    else:
+        version, sep, _ = state.partition(b":")
+        if not sep:
+            raise MissingFormatVersionError
+        raise UnsupportedFormatVersionError(version.decode(STATE_ENCODING, errors="replace"))
+
+    if len(b64bytes) < PYBASE64_MIN_SIZE:
+        compressed_bytes = base64.b64decode(b64bytes)
+    else:
+        compressed_bytes = pybase64.b64decode(b64bytes, validate=False)
+    if is_gzip:
+        json_bytes = gzip.decompress(compressed_bytes)  # type: ignore
+    else:
+        decompressor = isal_zlib.decompressobj(DEFLATE_WBITS, zdict=TERRAFORM_DICT)
+        json_bytes = decompressor.decompress(compressed_bytes) + decompressor.flush()
+        if not decompressor.eof:  # a raw stream has no checksum to catch this otherwise
+            raise TruncatedStateError
+    if LONG_INT_PATTERN.search(json_bytes):  # orjson would turn such integers into floats
+        return json.loads(json_bytes)
+    o = orjson.loads(json_bytes)
     return o
 
 
@@ -119,21 +207,147 @@ P = ParamSpec("P")
 T = TypeVar("T")
 
 
-def raise_bad_connection(f: Callable[P, T]) -> Callable[P, T]:
-    """Convert connection errors to HTTPExceptions in decorated function."""
+async def run_to_completion_in_threadpool(f: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call a blocking function in FastAPI's threadpool, and let it finish even when cancelled.
 
-    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-        try:
-            return f(*args, **kwargs)
-        except requests.exceptions.ConnectionError as e:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY) from e
-        except hvac.exceptions.Forbidden as e:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Vault authentication failed. Bad token or insufficient token scope.",
-            ) from e
+    A thread can't be stopped, so rather than returning while the call goes on in the background,
+    a cancellation is only raised once the call has finished.
 
-    return wrapper
+    Args:
+    ----
+        f: The function to call.
+        args: The positional arguments of the call.
+        kwargs: The keyword arguments of the call.
+
+    """
+    future = asyncio.ensure_future(run_in_threadpool(f, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+async def gather_or_cancel(*aws: Awaitable[Any]) -> list[Any]:
+    """Await awaitables concurrently, like asyncio.gather, but stop them all on the first failure.
+
+    Unlike asyncio.gather, the failure is only raised once the other awaitables have been
+    cancelled and have finished, so that none of them goes on talking to Vault after it.
+
+    Args:
+    ----
+        aws: The awaitables to await.
+
+    Returns:
+    -------
+        The results of the awaitables, in the order of `aws`.
+
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def gather_in_threadpool(
+    f: Callable[..., T], args: Iterable[tuple[Any, ...]], limit: int = MAX_CONCURRENT_REQUESTS
+) -> list[T]:
+    """Call a blocking function once per args tuple, concurrently, in FastAPI's threadpool.
+
+    On the first failure, the calls that haven't started are skipped, and the running ones
+    are waited for before the failure is raised.
+
+    Args:
+    ----
+        f: The function to call.
+        args: The positional arguments of each call.
+        limit: The max number of calls running at once.
+
+    Returns:
+    -------
+        The results of the calls, in the order of `args`.
+
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def call(call_args: tuple[Any, ...]) -> T:
+        async with semaphore:
+            return await run_to_completion_in_threadpool(f, *call_args)
+
+    return await gather_or_cancel(*(call(call_args) for call_args in args))
+
+
+class HTTPXResponse:
+    """A httpx.Response, with the `ok` attribute of a requests.Response that hvac relies on."""
+
+    def __init__(self, response: httpx.Response) -> None:
+        self.response = response
+
+    @property
+    def ok(self) -> bool:
+        """Whether the response status is below 400, like requests.Response.ok."""
+        return not self.response.is_error
+
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything else to the httpx.Response."""
+        return getattr(self.response, name)
+
+
+class HTTPXSession:
+    """Stand-in for the requests.Session of a hvac adapter, sending requests through httpx.
+
+    TLS verification and client certs are configured on the httpx.Client, so the per-request
+    ones that hvac passes along are dropped. So are hvac's proxies, which are never set here:
+    httpx picks up proxies from the HTTP(S)_PROXY environment variables, like requests does.
+    """
+
+    cert = verify = proxies = None
+
+    def __init__(self, client: httpx.Client) -> None:
+        self.client = client
+
+    def request(
+        self, method: str, url: str, *, allow_redirects: bool = True, **kwargs: Any
+    ) -> HTTPXResponse:
+        """Send a request, taking the same keyword arguments as requests.Session.request."""
+        for requests_only_kwarg in ("cert", "verify", "proxies"):
+            kwargs.pop(requests_only_kwarg, None)
+        response = self.client.request(method, url, follow_redirects=allow_redirects, **kwargs)
+        return HTTPXResponse(response)
+
+    def close(self) -> None:
+        """Do nothing, since the httpx.Client is shared between sessions."""
+
+
+@functools.lru_cache(maxsize=None)
+def get_http2_client(verify: bool | str, cert: tuple[str, str] | None) -> httpx.Client:
+    """Return the process-wide HTTP/2 client for a TLS configuration.
+
+    Sharing one client keeps its connections to Vault alive between requests,
+    and lets concurrent chunk requests be multiplexed on a single connection.
+    """
+    return httpx.Client(http2=True, verify=verify, cert=cert)
+
+
+class HTTP2Adapter(hvac.adapters.JSONAdapter):  # type: ignore
+    """hvac adapter that talks to Vault over HTTP/2 (when offered by Vault) with httpx."""
+
+    def __init__(
+        self,
+        *args: Any,
+        verify: bool | str = True,
+        cert: tuple[str, str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if verify is True:
+            # Trust the CA bundle requests would, as httpx only reads SSL_CERT_FILE/SSL_CERT_DIR
+            ca_bundle = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE")
+            verify = ca_bundle or True
+        kwargs["session"] = HTTPXSession(get_http2_client(verify, cert))
+        super().__init__(*args, verify=verify, cert=cert, **kwargs)
 
 
 X = TypeVar("X")
@@ -143,12 +357,11 @@ def coercer(f: Callable[Concatenate[X, P], T]) -> Callable[Concatenate[X, P], T]
     """Attr coercion wrapper with logging."""
 
     def wrapper(x: X, /, *args: P.args, **kwargs: P.kwargs) -> T:
-        fstatic = f.__get__(object)
-        y = cast(T, fstatic(x, *args, **kwargs))
+        y = f(x, *args, **kwargs)
         if y != x:
-            logging.debug("'%s': '%s' --> '%s'", fstatic.__name__, x, y)
+            logging.debug("'%s': '%s' --> '%s'", f.__name__, x, y)
         else:
-            logging.debug("'%s': no-op '%s'", fstatic.__name__, x)
+            logging.debug("'%s': no-op '%s'", f.__name__, x)
         return y
 
     return wrapper
@@ -188,12 +401,16 @@ class Vault:
     secrets_path: str
     chunk_size: int
 
-    @property
+    # Max chunk sizes found by probing, per Vault URL. Shared by all instances,
+    # since a new instance is created for every request.
+    _probed_chunk_sizes: ClassVar[dict[str, int]] = {}
+
+    @functools.cached_property
     def lock_path(self) -> str:
         """The path to the lock, computed from `secrets_path`."""
         return _make_path(self.secrets_path, "lock")
 
-    @property
+    @functools.cached_property
     def state_path(self) -> str:
         """The path to the state, computed from `secrets_path`."""
         return _make_path(self.secrets_path, "state")
@@ -210,23 +427,29 @@ class Vault:
             The path to the chunk.
 
         """
-        return _make_path(self.state_path, chunk)
+        return f"{self.state_path}/{chunk}"  # neither part is ever empty
 
-    @coercer
     @staticmethod
+    @functools.lru_cache(maxsize=COERCION_CACHE_SIZE)
+    @coercer
     def _vault_url_coercer(vault_url: str) -> str:
         return vault_url if vault_url.startswith("http") else f"https://{vault_url}"
 
-    @coercer
     @staticmethod
+    @functools.lru_cache(maxsize=COERCION_CACHE_SIZE)
+    @coercer
     def _url_path_coercer(url_path: str) -> str:
         return url_path.strip("/")
 
     @classmethod
+    @functools.lru_cache(maxsize=COERCION_CACHE_SIZE)
     def from_coerced_attrs(
         cls: type[Vault], vault_url: str, mount_point: str, secrets_path: str, chunk_size: int
     ) -> Vault:
-        """Return a Vault instance with attrs being coerced. Useful for CLI sanitizing."""
+        """Return a Vault instance with attrs being coerced. Useful for CLI sanitizing.
+
+        Instances are cached, since the same attrs are passed on every request to a state.
+        """
         return cls(
             vault_url=cls._vault_url_coercer(vault_url),
             mount_point=cls._url_path_coercer(mount_point),
@@ -237,14 +460,17 @@ class Vault:
     def _mk_client(self, token: str) -> hvac.Client:
         """Get an instance of a Vault client.
 
+        Build one client per Vault operation and pass it around. Connections aren't owned
+        by the client: its HTTP2Adapter sends requests through the process-wide httpx client
+        of get_http2_client, whose connection pool is shared by all operations.
+
         Args:
         ----
         token: the vault token to use for authentication.
 
         """
-        return hvac.Client(url=self.vault_url, token=token)
+        return hvac.Client(url=self.vault_url, token=token, adapter=HTTP2Adapter)
 
-    @raise_bad_connection
     def get_lock_data(self, token: str) -> LockData:
         """Return the lock data."""
         logging.info("Getting lock data from vault...")
@@ -254,7 +480,6 @@ class Vault:
             raise_on_deleted_version=True,  # default will change to false in the near future
         )["data"]["data"]
 
-    @raise_bad_connection
     def acquire_lock(self, token: str, lock_data: LockData) -> None:
         """Acquire the lock for the Terraform state.
 
@@ -279,7 +504,6 @@ class Vault:
             ) from e
         logging.info("Acquired lock successfully!")
 
-    @raise_bad_connection
     def release_lock(self, token: str) -> None:
         """Release the lock for the Terraform state.
 
@@ -298,29 +522,45 @@ class Vault:
         )
         logging.info("Lock released!")
 
-    @raise_bad_connection
-    def _get_chunk_keys(self, token: str) -> Iterable[str]:
+    def _get_chunk_keys(self, client: hvac.Client, *, missing_ok: bool = False) -> Iterable[str]:
         logging.info("Looking for state chunks...")
         try:
             chunk_keys = cast(
                 Collection[str],
-                self._mk_client(token).secrets.kv.v2.list_secrets(
+                client.secrets.kv.v2.list_secrets(
                     path=self.state_path,
                     mount_point=self.mount_point,
                 )["data"]["keys"],
             )
             logging.info("Found %d state chunks: %s", len(chunk_keys), strtuple(chunk_keys))
         except hvac.exceptions.InvalidPath as e:
+            if missing_ok:
+                logging.info("Found no state chunks")
+                return []
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No state exists"
             ) from e
         else:
             return chunk_keys
 
-    @raise_bad_connection
-    def get_state(self, token: str) -> StateData:
+    def _get_chunk(self, client: hvac.Client, chunk_key: str) -> str | None:
+        logging.info("Getting state chunk %s...", chunk_key)
+        data = client.secrets.kv.v2.read_secret_version(
+            path=self.get_state_chunk_path(chunk_key),
+            mount_point=self.mount_point,
+            raise_on_deleted_version=False,
+        )
+        if data["data"]["metadata"]["deletion_time"] != "":
+            logging.info("State chunk %s has been deleted, marked as invalid", chunk_key)
+            return None
+        logging.info("State chunk %s: is OK", chunk_key)
+        return cast(str, data["data"]["data"]["value"])
+
+    async def get_state(self, token: str) -> StateData:
         """Return the Terraform state.
 
+        The state chunks are fetched from Vault concurrently.
+
         Args:
         ----
             token: the vault token to use for authentication.
@@ -331,77 +571,133 @@ class Vault:
 
         """
         logging.info("Getting state...")
-        chunks: dict[str, str | None] = {
-            chunk_key: None for chunk_key in self._get_chunk_keys(token)
-        }
-        for chunk_key in chunks:
-            logging.info("Getting state chunk %s...", chunk_key)
-            data = self._mk_client(token).secrets.kv.v2.read_secret_version(
-                path=self.get_state_chunk_path(chunk_key),
-                mount_point=self.mount_point,
-                raise_on_deleted_version=False,
-            )
-            if data["data"]["metadata"]["deletion_time"] != "":
-                logging.info("State chunk %s has been deleted, marked as invalid", chunk_key)
+        client = self._mk_client(token)
+        # Vault lists keys lexicographically, i.e. "10" before "2"
+        chunk_keys = sorted(await run_in_threadpool(self._get_chunk_keys, client), key=int)
+        chunks = await gather_in_threadpool(
+            self._get_chunk, ((client, chunk_key) for chunk_key in chunk_keys)
+        )
+
+        logging.info("Total chunks: %s", strtuple(chunk_keys))
+        logging.info("Valid chunks: %s", strtuple(k for k, c in zip(chunk_keys, chunks) if c))
+        logging.info("Invalid chunks: %s", strtuple(k for k, c in zip(chunk_keys, chunks) if not c))
+        return unpack_state("".join(filter(None, chunks))) or {}
+
+    def _put_probing_chunk(
+        self, client: hvac.Client, chunk_key: int, chunk: bytes | memoryview
+    ) -> bool:
+        try:
+            self._put_chunk(client, chunk_key, chunk)
+        except hvac.exceptions.InternalServerError as e:
+            if not is_maxlimit_error(e):
+                raise e from e
+            logging.info("Chunk length %d too long", len(chunk))
+            return False
+        else:
+            return True
+
+    def _chunk_size_probe(self, client: hvac.Client, data: bytes) -> tuple[int, int, int]:
+        """Find a chunk size that Vault accepts, storing the leading chunks of `data` meanwhile.
+
+        Reuse the max chunk size found by an earlier probe if there is one. Otherwise,
+        double the chunk size from PROBE_START_SIZE (or halve it) until Vault's limit
+        is bracketed, then bisect the bracket down to PROBE_PRECISION.
+
+        Every probing chunk that Vault accepts is kept as a chunk of the state,
+        so the only wasted writes are those rejected for being too large.
+
+        Args:
+        ----
+            client: The Vault client to probe with.
+            data: The packed state to be chunked.
+
+        Returns:
+        -------
+            The chunk size, the number of chunks stored and the length of `data` they cover.
+
+        """
+        view = memoryview(data)
+        chunks_done = 0
+        chunk_pos = 0
+
+        def probe(cut_off: int) -> bool:
+            nonlocal chunks_done, chunk_pos
+            logging.info("Probing vault with a state chunk of %d bytes...", cut_off)
+            chunk = view[chunk_pos : chunk_pos + cut_off]
+            if not self._put_probing_chunk(client, chunks_done, chunk):
+                return False
+            chunks_done += 1
+            chunk_pos += len(chunk)
+            return True
+
+        probed = self._probed_chunk_sizes.get(self.vault_url)
+        if probed is not None:
+            logging.info("Chunk size probing starting at previously probed %d bytes", probed)
+            if probe(probed):
+                logging.info("Chunk size probing succeeded: length of %d is OK!", probed)
+                return probed, chunks_done, chunk_pos
+            # A concurrent probe may have found it rejected and dropped it already
+            self._probed_chunk_sizes.pop(self.vault_url, None)
+
+        logging.info("Chunk size probing starting at %d bytes", PROBE_START_SIZE)
+        good, bad = 0, None  # largest accepted and smallest rejected chunk sizes
+        cut_off = PROBE_START_SIZE
+        while chunk_pos < len(data):  # stop early if all of data gets stored while probing
+            if probe(cut_off):
+                good = cut_off
             else:
-                logging.info("State chunk %s: is OK", chunk_key)
-                chunks[chunk_key] = data["data"]["data"]["value"]
-
-        valid_chunks = {k: v for k, v in chunks.items() if v}
-        invalid_chunks = {k: v for k, v in chunks.items() if not v}
-
-        logging.info("Total chunks: %s", strtuple(chunks))
-        logging.info("Valid chunks: %s", strtuple(valid_chunks))
-        logging.info("Invalid chunks: %s", strtuple(invalid_chunks))
-        return unpack_state("".join(valid_chunks.values())) or {}
-
-    def _chunk_size_probe(self, token: str, data: str) -> int:
-        cut_off = len(data)
-        logging.info("Chunk size probing starting at %d chars", cut_off)
-        while True:
-            logging.info("Probing vault with a state chunk of %d chars...", cut_off)
-            probing_chunk = data[:cut_off]
-            try:
-                self._mk_client(token).secrets.kv.v2.create_or_update_secret(
-                    path=self.get_state_chunk_path(0),
-                    mount_point=self.mount_point,
-                    secret={"value": probing_chunk},
-                )
-            except hvac.exceptions.InternalServerError as e:
-                if not is_maxlimit_error(e):
-                    raise e from e
-                new_cut_off = cut_off // 2
-                logging.info("Chunk length %d too long, retry with %d", cut_off, new_cut_off)
-                cut_off = new_cut_off
+                bad = cut_off
+
+            if bad is None:
+                cut_off = good * 2
+            elif good == 0:
+                cut_off = bad // 2
+            elif (bad - good) * PROBE_PRECISION > good:
+                cut_off = (good + bad) // 2
             else:
-                logging.info("Chunk size probing succeeded: length of %d is OK!", cut_off)
-                return cut_off
+                self._probed_chunk_sizes[self.vault_url] = good
+                break
+
+        logging.info("Chunk size probing succeeded: length of %d is OK!", good)
+        return good, chunks_done, chunk_pos
 
     def _get_static_cut_off_(self) -> int:
-        # Assume that we use UTF8. This means that each char is stored as one (1) byte,
-        # i.e. the length of a string equals its size in bytes.
+        # The packed state is ASCII, i.e. its length equals its size in bytes.
         # That means, for example, that a secret store with a
-        # max limit of 1MB should fit a million characters long string.
+        # max limit of 1MB should fit a million bytes long chunk.
         # However, in practice, we also end up needing
         # a margin for things like the request dict size and CPython internals.
-        if not STATE_ENCODING == "utf-8":
-            raise NotImplementedError
         return self.chunk_size - 1000  # margin
 
-    def _delete_old_chunks(self, token: str, chunks_done: int) -> None:
-        unset_chunk_keys = [k for k in self._get_chunk_keys(token) if int(k) > (chunks_done - 1)]
+    def _delete_chunk(self, client: hvac.Client, chunk_key: str) -> None:
+        logging.info("Marking %s as deleted...", chunk_key)
+        client.secrets.kv.v2.delete_latest_version_of_secret(
+            path=self.get_state_chunk_path(chunk_key), mount_point=self.mount_point
+        )
+
+    async def _delete_old_chunks(
+        self, client: hvac.Client, old_chunk_keys: Iterable[str], chunks_done: int
+    ) -> None:
+        unset_chunk_keys = [k for k in old_chunk_keys if int(k) >= chunks_done]
         logging.info("Marking unset chunks %s as deleted...", strtuple(unset_chunk_keys))
-        for chunk_key in unset_chunk_keys:
-            logging.info("Marking %s as deleted...", chunk_key)
-            self._mk_client(token).secrets.kv.v2.delete_latest_version_of_secret(
-                path=self.get_state_chunk_path(chunk_key), mount_point=self.mount_point
-            )
+        await gather_in_threadpool(
+            self._delete_chunk, ((client, chunk_key) for chunk_key in unset_chunk_keys)
+        )
         logging.info("OK: Unset chunks marked as deleted.")
 
-    @raise_bad_connection
-    def set_state(self, token: str, value: Any) -> None:
+    def _put_chunk(self, client: hvac.Client, chunk_key: int, chunk: bytes | memoryview) -> None:
+        logging.info("Sending chunk %d (%d bytes)...", chunk_key, len(chunk))
+        client.secrets.kv.v2.create_or_update_secret(
+            path=self.get_state_chunk_path(chunk_key),
+            mount_point=self.mount_point,
+            secret={"value": str(chunk, STATE_ENCODING)},
+        )
+
+    async def set_state(self, token: str, value: Any) -> None:
         """Setter for Terraform state.
 
+        The state chunks are sent to Vault concurrently.
+
         Args:
         ----
             token: the vault token to use for authentication.
@@ -409,37 +705,68 @@ class Vault:
 
         """
         logging.info("Setting state...")
-        logging.debug("Encoding & compressing state dict into string...")
+        logging.debug("Encoding & compressing state dict into bytes...")
         packed_state = pack_state(value)
 
-        chunks_done = 0
-        chunk_pos = 0
+        client = self._mk_client(token)
+        # Look for the current chunks while the new ones are being sent, to know the
+        # leftovers to delete afterwards. New chunks are never leftovers, so the
+        # order in which Vault sees the listing and the writes doesn't matter.
+        # If either fails, the other is stopped before the failure is raised.
+        old_chunk_keys, chunks_done = await gather_or_cancel(
+            run_to_completion_in_threadpool(self._get_chunk_keys, client, missing_ok=True),
+            self._put_chunks(client, packed_state),
+        )
+        await self._delete_old_chunks(client, old_chunk_keys, chunks_done)
+        logging.info("OK: State set.")
+
+    async def _put_chunks(self, client: hvac.Client, packed_state: bytes) -> int:
         if self.chunk_size == -1:  # probe
             logging.info("Chunk size probing enabled!")
-            cut_off = self._chunk_size_probe(token=token, data=packed_state)
-            chunks_done += 1
-            chunk_pos += cut_off
+            cut_off, chunks_done, chunk_pos = await run_to_completion_in_threadpool(
+                self._chunk_size_probe, client, packed_state
+            )
         else:  # don't probe
             logging.info("Chunk size probing disabled! Set at %d bytes.", self.chunk_size)
             cut_off = self._get_static_cut_off_()
+            chunks_done = 0
+            chunk_pos = 0
+
+        # Slice views rather than bytes, so that each chunk is only ever copied
+        # into the str sent to Vault, and only while it's being sent.
+        view = memoryview(packed_state)
+        chunk_positions = range(chunk_pos, len(packed_state), cut_off)
+        await gather_in_threadpool(
+            self._put_chunk,
+            (
+                (client, chunks_done + i, view[pos : pos + cut_off])
+                for i, pos in enumerate(chunk_positions)
+            ),
+        )
+        return chunks_done + len(chunk_positions)
 
-        while chunk_pos < len(packed_state):
-            new_chunk_pos = chunk_pos + cut_off
-            logging.info("Sending chunk [%d:%d]...", chunk_pos, new_chunk_pos)
-            chunk = packed_state[chunk_pos:new_chunk_pos]
-            self._mk_client(token).secrets.kv.v2.create_or_update_secret(
-                path=self.get_state_chunk_path(chunks_done),
-                mount_point=self.mount_point,
-                secret={"value": chunk},
-            )
-            chunks_done += 1
-            chunk_pos = new_chunk_pos
 
-        self._delete_old_chunks(token=token, chunks_done=chunks_done)
-        logging.info("OK: State set.")
+app = FastAPI()
 
 
-app = FastAPI()
+@app.exception_handler(httpx.TransportError)
+async def bad_connection_handler(request: Request, exc: Exception) -> Response:
+    """Respond to a failed connection to Vault with a bad gateway error."""
+    logging.warning("Connection to Vault failed: %s", exc)
+    return await http_exception_handler(request, HTTPException(status.HTTP_502_BAD_GATEWAY))
+
+
+@app.exception_handler(hvac.exceptions.Forbidden)
+async def forbidden_handler(request: Request, exc: Exception) -> Response:
+    """Respond to Vault denying access with a forbidden error."""
+    logging.warning("Vault denied access: %s", exc)
+    return await http_exception_handler(
+        request,
+        HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Vault authentication failed. Bad token or insufficient token scope.",
+        ),
+    )
 
 
 def start() -> None:
@@ -551,7 +878,7 @@ async def read_v1_head() -> Response:
 @app.get("/v1/state/{secrets_path:path}")
 async def get_state(vault: VaultDep, token: TokenDep) -> StateData:
     """Get the Vault state."""
-    return vault.get_state(token=token)
+    return await vault.get_state(token=token)
 
 
 @app.post("/v1/state/{secrets_path:path}")
@@ -563,7 +890,7 @@ async def update_state(request: Request, vault: VaultDep, token: TokenDep) -> No
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Recieved malformed JSON!"
         ) from e
-    vault.set_state(token=token, value=data)
+    await vault.set_state(token=token, value=data)
 
 
 @app.get("/v1/lock/{secrets_path:path}")
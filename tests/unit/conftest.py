@@ -0,0 +1,62 @@
+"""Fakes and fixtures shared by the unit tests."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import hvac.exceptions  # type: ignore
+import pytest
+
+from src.__main__ import Vault
+
+MAX_VALUE_SIZE = 100_000
+
+
+class FakeKV:
+    """Stand-in for hvac's KV v2 API that rejects values larger than MAX_VALUE_SIZE."""
+
+    def __init__(self) -> None:
+        self.stored: dict[str, str] = {}
+        self.deleted: set[str] = set()
+        self.puts = 0
+        self.rejected = 0
+
+    def create_or_update_secret(self, path: str, secret: dict[str, str], **_: Any) -> None:
+        """Store a secret, like Vault would."""
+        self.puts += 1
+        if len(secret["value"]) > MAX_VALUE_SIZE:
+            self.rejected += 1
+            errors = ["put failed due to value being too large"]
+            raise hvac.exceptions.InternalServerError(errors=errors)
+        self.stored[path] = secret["value"]
+        self.deleted.discard(path)
+
+    def list_secrets(self, path: str, **_: Any) -> dict[str, Any]:
+        """List the secrets under a path, deleted ones included, in Vault's lexicographic order."""
+        prefix = f"{path}/"
+        keys = sorted(k[len(prefix) :] for k in self.stored if k.startswith(prefix))
+        if not keys:
+            raise hvac.exceptions.InvalidPath
+        return {"data": {"keys": keys}}
+
+    def read_secret_version(self, path: str, **_: Any) -> dict[str, Any]:
+        """Read a secret, with a deletion time if its latest version is deleted."""
+        if path in self.deleted:
+            return {"data": {"data": None, "metadata": {"deletion_time": "2024-01-01T00:00:00Z"}}}
+        return {"data": {"data": {"value": self.stored[path]}, "metadata": {"deletion_time": ""}}}
+
+    def delete_latest_version_of_secret(self, path: str, **_: Any) -> None:
+        """Mark the latest version of a secret as deleted."""
+        self.deleted.add(path)
+
+
+def fake_client(kv: FakeKV) -> Any:
+    """Return an object with the shape of an hvac.Client."""
+    return SimpleNamespace(secrets=SimpleNamespace(kv=SimpleNamespace(v2=kv)))
+
+
+@pytest.fixture(autouse=True)
+def _clear_probed_chunk_sizes() -> None:
+    """Forget the chunk sizes probed by earlier tests."""
+    Vault._probed_chunk_sizes.clear()  # noqa: SLF001
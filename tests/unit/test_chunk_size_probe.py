@@ -0,0 +1,75 @@
+"""Test that chunk size probing finds a chunk size that Vault accepts."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import hvac.exceptions  # type: ignore
+
+from src.__main__ import PROBE_PRECISION, Vault
+
+from .conftest import MAX_VALUE_SIZE, FakeKV, fake_client
+
+
+def mk_vault() -> Vault:
+    """Return a probing Vault instance."""
+    return Vault(vault_url="https://vault", mount_point="secret", secrets_path="foo", chunk_size=-1)
+
+
+def test_probe_small_state() -> None:
+    """Test that a state smaller than the limit is stored whole, in one put."""
+    kv = FakeKV()
+    data = b"x" * 1000
+    _, chunks_done, chunk_pos = mk_vault()._chunk_size_probe(fake_client(kv), data)  # noqa: SLF001
+    assert (chunks_done, chunk_pos) == (1, len(data))
+    assert kv.stored["foo/state/0"] == data.decode()
+    assert kv.puts == 1
+
+
+def stored_state(kv: FakeKV, chunks_done: int) -> str:
+    """Join the state chunks stored in the fake KV store."""
+    return "".join(kv.stored[f"foo/state/{i}"] for i in range(chunks_done))
+
+
+def test_probe_large_state() -> None:
+    """Test that probing a large state finds a near-max chunk size and stores its chunks."""
+    kv = FakeKV()
+    data = b"0123456789" * MAX_VALUE_SIZE
+    cut_off, chunks_done, chunk_pos = mk_vault()._chunk_size_probe(fake_client(kv), data)  # noqa: SLF001
+    assert MAX_VALUE_SIZE * (1 - 1 / PROBE_PRECISION) <= cut_off <= MAX_VALUE_SIZE
+    assert stored_state(kv, chunks_done) == data[:chunk_pos].decode()
+
+
+def test_probe_keeps_accepted_chunks() -> None:
+    """Test that every probing chunk accepted by Vault is kept as a state chunk."""
+    kv = FakeKV()
+    data = b"0123456789" * MAX_VALUE_SIZE
+    _, chunks_done, _ = mk_vault()._chunk_size_probe(fake_client(kv), data)  # noqa: SLF001
+    assert chunks_done == kv.puts - kv.rejected
+
+
+def test_probe_reuses_probed_size() -> None:
+    """Test that a chunk size found by probing is reused by the next probe."""
+    data = b"0123456789" * MAX_VALUE_SIZE
+    cut_off, _, _ = mk_vault()._chunk_size_probe(fake_client(FakeKV()), data)  # noqa: SLF001
+    kv = FakeKV()
+    assert mk_vault()._chunk_size_probe(fake_client(kv), data) == (cut_off, 1, cut_off)  # noqa: SLF001
+    assert kv.puts == 1
+
+
+def test_probe_survives_concurrently_dropped_size() -> None:
+    """Test that probing goes on when a concurrent probe drops the rejected probed size first."""
+
+    class ConcurrentlyProbedKV(FakeKV):
+        def create_or_update_secret(self, path: str, secret: dict[str, str], **_: Any) -> None:
+            try:
+                super().create_or_update_secret(path, secret)
+            except hvac.exceptions.InternalServerError:
+                Vault._probed_chunk_sizes.pop("https://vault", None)  # noqa: SLF001
+                raise
+
+    Vault._probed_chunk_sizes["https://vault"] = 2 * MAX_VALUE_SIZE  # noqa: SLF001
+    kv = ConcurrentlyProbedKV()
+    data = b"0123456789" * MAX_VALUE_SIZE
+    _, chunks_done, chunk_pos = mk_vault()._chunk_size_probe(fake_client(kv), data)  # noqa: SLF001
+    assert stored_state(kv, chunks_done) == data[:chunk_pos].decode()
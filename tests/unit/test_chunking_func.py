@@ -6,13 +6,17 @@ highly volatile.
 """
 
 import base64
+import gzip
+import json
 from typing import Any, cast
 
 import pytest
 
 from src.__main__ import (
     FORMAT_VERSION,
+    GZIP_FORMAT_VERSION,
     MissingFormatVersionError,
+    TruncatedStateError,
     UnsupportedFormatVersionError,
     pack_state,
     unpack_state,
@@ -42,6 +46,13 @@ def test_int_chunk() -> None:
     assert chunking_is_inverse(o)
 
 
+def test_big_int_chunk() -> None:
+    """Test that an int beyond 64 bits, as Terraform numbers can be, is chunked correctly."""
+    o = {"x": 2**64}
+    assert chunking_is_inverse(o)
+    assert isinstance(unpack_state(pack_state(o))["x"], int)  # as 2**64 == float(2**64)
+
+
 def test_list_chunk() -> None:
     """Test that a list is chunked correctly."""
     o = [1, 2, 3]
@@ -54,11 +65,40 @@ def test_dict_chunk() -> None:
     assert chunking_is_inverse(o)
 
 
+def test_large_chunk() -> None:
+    """Test that a state large enough to not fit in a small buffer is chunked correctly."""
+    o = {f"resource_{i}": {"id": i, "attributes": list(range(i % 10))} for i in range(10_000)}
+    assert chunking_is_inverse(o)
+
+
+def test_str_state_unpacks() -> None:
+    """Test that a serialized state can be unpacked from its str form, as read from Vault."""
+    o = {"foo": "bar"}
+    assert unpack_state(pack_state(o).decode("utf-8")) == o
+
+
+def test_stdlib_gzip_state_unpacks() -> None:
+    """Test that gzip states, as packed by earlier versions, can still be unpacked."""
+    o = {"foo": "bar"}
+    gzip_bytes = gzip.compress(json.dumps(o).encode("utf-8"), compresslevel=9, mtime=0)
+    serialized = f"{GZIP_FORMAT_VERSION}:{base64.b64encode(gzip_bytes).decode('utf-8')}"
+    assert unpack_state(serialized) == o
+
+
+def test_deserialize_truncated_state() -> None:
+    """Test that deserialization fails on a state missing the end of its compressed data."""
+    o = {f"resource_{i}": {"id": i} for i in range(100)}
+    prefix, b64bytes = pack_state(o).split(b":")
+    truncated = base64.b64encode(base64.b64decode(b64bytes)[:-1])
+    with pytest.raises(TruncatedStateError):
+        unpack_state(b":".join((prefix, truncated)))
+
+
 def test_serialize_version_prefix() -> None:
     """Test that serialized state contains the current version as a prefix."""
     o = {"foo": "bar"}
     serialized = pack_state(o)
-    assert serialized.startswith(f"{FORMAT_VERSION}:")
+    assert serialized.startswith(f"{FORMAT_VERSION}:".encode())
 
 
 def test_deserialize_missing_version_prefix() -> None:
@@ -68,6 +108,13 @@ def test_deserialize_missing_version_prefix() -> None:
         unpack_state(o)
 
 
+def test_deserialize_missing_version_prefix_bytes() -> None:
+    """Test that deserialization of bytes fails on missing version prefix."""
+    o = base64.b64encode(b"{'foo': 'bar'}")
+    with pytest.raises(MissingFormatVersionError):
+        unpack_state(o)
+
+
 def test_deserialize_unsupported_version() -> None:
     """Test that deserialization fails on unsupported version."""
     payload = base64.b64encode(b"{'foo': 'bar'}").decode("utf-8")
@@ -0,0 +1,44 @@
+"""Test that errors talking to Vault are turned into the matching HTTP errors."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import httpx
+import hvac.exceptions  # type: ignore
+import pytest
+from fastapi.testclient import TestClient
+
+from src.__main__ import Vault, app
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    """Return a client for the app, configured like start() would."""
+    app.state.vault_url = "https://vault"
+    app.state.mount_point = "secret"
+    app.state.chunk_size = -1
+    return TestClient(app)
+
+
+def get_lock_raising(monkeypatch: pytest.MonkeyPatch, client: TestClient, e: Exception) -> Any:
+    """Get the lock, while Vault fails with the given error."""
+
+    def raise_e(*_: Any, **__: Any) -> None:
+        raise e
+
+    monkeypatch.setattr(Vault, "get_lock_data", raise_e)
+    return client.get("/v1/lock/foo", auth=("token", ""))
+
+
+def test_bad_connection_is_bad_gateway(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    """Test that failing to connect to Vault responds with 502."""
+    e = httpx.ConnectError("connection refused")
+    assert get_lock_raising(monkeypatch, client, e).status_code == 502  # noqa: PLR2004
+
+
+def test_forbidden_is_forbidden(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    """Test that Vault denying access responds with 403."""
+    response = get_lock_raising(monkeypatch, client, hvac.exceptions.Forbidden())
+    assert response.status_code == 403  # noqa: PLR2004
+    assert "Bad token" in response.json()["detail"]
@@ -0,0 +1,142 @@
+"""Test that hvac talks to Vault through the httpx based HTTP2Adapter."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import httpx
+import hvac  # type: ignore
+import hvac.exceptions  # type: ignore
+import pytest
+
+import src.__main__
+from src.__main__ import HTTP2Adapter
+
+
+class FakeVault:
+    """Stand-in for Vault's HTTP API for a KV v2 store mounted at secret/."""
+
+    def __init__(self) -> None:
+        self.secrets: dict[str, Any] = {}
+        self.requests: list[httpx.Request] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Respond to a request, like Vault would."""
+        self.requests.append(request)
+        if request.url.host == "standby":
+            location = str(request.url.copy_with(host="vault"))
+            return httpx.Response(307, headers={"Location": location})
+        if request.headers.get("X-Vault-Token") != "token":
+            return httpx.Response(403, json={"errors": ["permission denied"]})
+        handlers = {
+            ("LIST", "metadata"): self.list_secrets,
+            ("POST", "data"): self.write_secret,
+            ("GET", "data"): self.read_secret,
+            ("DELETE", "data"): self.delete_secret,
+        }
+        kind, _ = secret_path(request)
+        return handlers.get((request.method, kind), not_found)(request)
+
+    def list_secrets(self, request: httpx.Request) -> httpx.Response:
+        """List the secrets under a path."""
+        _, path = secret_path(request)
+        keys = sorted(k[len(path) + 1 :] for k in self.secrets if k.startswith(f"{path}/"))
+        if not keys:
+            return not_found(request)
+        return httpx.Response(200, json={"data": {"keys": keys}})
+
+    def write_secret(self, request: httpx.Request) -> httpx.Response:
+        """Write a secret."""
+        _, path = secret_path(request)
+        self.secrets[path] = json.loads(request.content)["data"]
+        return httpx.Response(200, json={"data": {"version": 1}})
+
+    def read_secret(self, request: httpx.Request) -> httpx.Response:
+        """Read a secret."""
+        _, path = secret_path(request)
+        if path not in self.secrets:
+            return not_found(request)
+        data = {"data": self.secrets[path], "metadata": {"deletion_time": "", "version": 1}}
+        return httpx.Response(200, json={"data": data})
+
+    def delete_secret(self, request: httpx.Request) -> httpx.Response:
+        """Delete a secret."""
+        _, path = secret_path(request)
+        if self.secrets.pop(path, None) is None:
+            return not_found(request)
+        return httpx.Response(204)
+
+
+def secret_path(request: httpx.Request) -> tuple[str, str]:
+    """Split the path of a request to the KV store into its kind, e.g. data, and secret path."""
+    kind, _, path = request.url.path[len("/v1/secret/") :].partition("/")
+    return kind, path
+
+
+def not_found(_: httpx.Request) -> httpx.Response:
+    """Respond that nothing exists at the path of a request."""
+    return httpx.Response(404, json={"errors": []})
+
+
+@pytest.fixture()
+def vault(monkeypatch: pytest.MonkeyPatch) -> FakeVault:
+    """Return the fake Vault that every HTTP2Adapter sends its requests to."""
+    vault = FakeVault()
+    client = httpx.Client(transport=httpx.MockTransport(vault.handle))
+    monkeypatch.setattr(src.__main__, "get_http2_client", lambda *_: client)
+    return vault
+
+
+def mk_client(token: str, url: str = "https://vault") -> Any:
+    """Return a hvac client that uses the HTTP2Adapter."""
+    return hvac.Client(url=url, token=token, adapter=HTTP2Adapter)
+
+
+def test_write_list_read_delete(vault: FakeVault) -> None:
+    """Test that secrets can be written, listed, read and deleted."""
+    kv = mk_client("token").secrets.kv.v2
+    kv.create_or_update_secret(path="foo/0", secret={"value": "bar"}, mount_point="secret")
+    keys = kv.list_secrets(path="foo", mount_point="secret")["data"]["keys"]
+    assert keys == ["0"]
+    secret = kv.read_secret_version(
+        path="foo/0", mount_point="secret", raise_on_deleted_version=False
+    )
+    assert secret["data"]["data"] == {"value": "bar"}
+    response = kv.delete_latest_version_of_secret(path="foo/0", mount_point="secret")
+    assert response.status_code == 204  # noqa: PLR2004
+    assert not vault.secrets
+    assert [r.method for r in vault.requests] == ["POST", "LIST", "GET", "DELETE"]
+
+
+def test_standby_redirect_is_followed(vault: FakeVault) -> None:
+    """Test that redirects, like those of a Vault standby node to the active one, are followed."""
+    kv = mk_client("token", url="https://standby").secrets.kv.v2
+    kv.create_or_update_secret(path="foo/0", secret={"value": "bar"}, mount_point="secret")
+    assert vault.secrets == {"foo/0": {"value": "bar"}}
+
+
+def test_missing_path_is_invalid_path(vault: FakeVault) -> None:  # noqa: ARG001
+    """Test that a 404 from Vault is raised as hvac's InvalidPath."""
+    with pytest.raises(hvac.exceptions.InvalidPath):
+        mk_client("token").secrets.kv.v2.list_secrets(path="foo", mount_point="secret")
+
+
+def test_bad_token_is_forbidden(vault: FakeVault) -> None:  # noqa: ARG001
+    """Test that a 403 from Vault is raised as hvac's Forbidden."""
+    with pytest.raises(hvac.exceptions.Forbidden):
+        mk_client("bad").secrets.kv.v2.list_secrets(path="foo", mount_point="secret")
+
+
+def test_requests_ca_bundle_is_trusted(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the CA bundle that requests would trust is passed on to httpx."""
+    tls_configs = []
+
+    def get_http2_client(*args: Any) -> httpx.Client:
+        tls_configs.append(args)
+        return httpx.Client()
+
+    monkeypatch.setattr(src.__main__, "get_http2_client", get_http2_client)
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", "/etc/ssl/internal-ca.pem")
+    mk_client("token")
+    assert tls_configs == [("/etc/ssl/internal-ca.pem", None)]
@@ -53,3 +53,8 @@ def test_secrets_path_coercion() -> None:
     coerced = "secretspath"
     for variant in variants:
         assert coerced_with(secrets_path=variant).secrets_path == coerced
+
+
+def test_coercion_is_cached() -> None:
+    """Test that coercing the same attrs twice returns the same Vault instance."""
+    assert coerced_with(vault_url="example.com") is coerced_with(vault_url="example.com")
@@ -0,0 +1,106 @@
+"""Test that Terraform states are stored in and read from Vault as chunks."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import Any
+
+import hvac.exceptions  # type: ignore
+import pytest
+
+from src.__main__ import Vault
+
+from .conftest import FakeKV, fake_client
+
+CHUNK_SIZE = 1500  # i.e. chunks of 500 bytes
+
+
+@pytest.fixture()
+def kv(monkeypatch: pytest.MonkeyPatch) -> FakeKV:
+    """Return the fake KV store that every Vault client talks to."""
+    kv = FakeKV()
+    monkeypatch.setattr(Vault, "_mk_client", lambda _, __: fake_client(kv))
+    return kv
+
+
+def mk_vault() -> Vault:
+    """Return a Vault instance with a static chunk size."""
+    return Vault(
+        vault_url="https://vault", mount_point="secret", secrets_path="foo", chunk_size=CHUNK_SIZE
+    )
+
+
+def large_state() -> Any:
+    """Return a state that barely compresses, so that it takes many chunks."""
+    return {"values": [hashlib.sha256(str(i).encode()).hexdigest() for i in range(300)]}
+
+
+def chunk_keys(kv: FakeKV) -> set[str]:
+    """Return the keys of the state chunks in the fake KV store."""
+    return {k.rsplit("/", 1)[1] for k in kv.stored}
+
+
+def test_state_of_many_chunks_roundtrips(kv: FakeKV) -> None:
+    """Test that a state of more than 10 chunks is read back with its chunks in order."""
+    o = large_state()
+    asyncio.run(mk_vault().set_state("token", o))
+    assert len(kv.stored) > 10  # noqa: PLR2004
+    assert asyncio.run(mk_vault().get_state("token")) == o
+
+
+def test_shrinking_state_deletes_old_chunks(kv: FakeKV) -> None:
+    """Test that exactly the chunks past the end of a shrunk state are marked as deleted."""
+    asyncio.run(mk_vault().set_state("token", large_state()))
+    old_chunk_keys = chunk_keys(kv)
+    o = {"foo": "bar"}
+    asyncio.run(mk_vault().set_state("token", o))
+    assert kv.deleted == {f"foo/state/{k}" for k in old_chunk_keys - {"0"}}
+    assert asyncio.run(mk_vault().get_state("token")) == o
+
+
+def test_growing_state_deletes_nothing(kv: FakeKV) -> None:
+    """Test that no chunk is marked as deleted when a state grows."""
+    asyncio.run(mk_vault().set_state("token", {"foo": "bar"}))
+    o = large_state()
+    asyncio.run(mk_vault().set_state("token", o))
+    assert not kv.deleted
+    assert asyncio.run(mk_vault().get_state("token")) == o
+
+
+def puts_after_failed_set_state(kv: FakeKV, e: type[Exception]) -> tuple[int, int]:
+    """Return the number of puts when set_state fails with e, and a while later."""
+
+    async def set_state_and_wait() -> tuple[int, int]:
+        with pytest.raises(e):
+            await mk_vault().set_state("token", large_state())
+        puts = kv.puts
+        await asyncio.sleep(0.5)
+        return puts, kv.puts
+
+    return asyncio.run(set_state_and_wait())
+
+
+def test_failed_put_stops_other_puts(kv: FakeKV, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that no chunk is written anymore once writing a chunk made set_state fail."""
+    put_chunk = Vault._put_chunk  # noqa: SLF001
+
+    def fail_chunk_2(self: Vault, client: Any, chunk_key: int, chunk: memoryview) -> None:
+        if chunk_key == 2:  # noqa: PLR2004
+            raise hvac.exceptions.InternalServerError
+        put_chunk(self, client, chunk_key, chunk)
+
+    monkeypatch.setattr(Vault, "_put_chunk", fail_chunk_2)
+    puts, later_puts = puts_after_failed_set_state(kv, hvac.exceptions.InternalServerError)
+    assert later_puts == puts
+
+
+def test_failed_listing_stops_puts(kv: FakeKV, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that no chunk is written anymore once listing the old chunks made set_state fail."""
+
+    def forbidden(*_: Any, **__: Any) -> None:
+        raise hvac.exceptions.Forbidden
+
+    monkeypatch.setattr(kv, "list_secrets", forbidden)
+    puts, later_puts = puts_after_failed_set_state(kv, hvac.exceptions.Forbidden)
+    assert later_puts == puts